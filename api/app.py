@@ -2,11 +2,32 @@
 Flask Application Factory
 """
 import logging
+import orjson
 from flask import Flask
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    option = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """Build the response body as bytes directly (skips the str round-trip)"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype="application/json"
+        )
+
 def create_app(config, state_machine):
     """
     Create and configure Flask application
@@ -24,6 +45,9 @@ def create_app(config, state_machine):
         static_folder='../web/static'
     )
     
+    # JSON encoding for jsonify() and request.json
+    app.json = OrjsonProvider(app)
+    
     # CORS configuration
     CORS(app)
     
@@ -2,11 +2,27 @@
 API Routes for Dashboard
 """
 import logging
-from flask import jsonify, request, render_template, send_from_directory, current_app
+import orjson
+from flask import Response, jsonify, request, render_template, send_from_directory, current_app
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+HISTORY_STREAM_BATCH = 256
+
+def stream_history(data):
+    """
+    Stream a history response ({"success": true, "data": [...]}) in batches
+    
+    Each chunk serializes HISTORY_STREAM_BATCH rows, keeping memory bounded
+    without paying per-row chunk overhead.
+    """
+    yield b'{"success":true,"data":['
+    for i in range(0, len(data), HISTORY_STREAM_BATCH):
+        chunk = orjson.dumps(data[i:i + HISTORY_STREAM_BATCH])[1:-1]
+        yield b',' + chunk if i else chunk
+    yield b']}'
+
 def get_system():
     """Get state machine instance"""
     return current_app.config['SYSTEM']
@@ -145,7 +161,7 @@ def register_routes(app):
                     system.servo.unlock()
             
             elif actuator == 'camera':
-                filename = system.camera.capture()
+                filename, _ = system.camera.capture()
                 system._log_event("PHOTO", f"Manual test: {filename}")
                 return jsonify({"success": True, "filename": filename})
             
@@ -174,7 +190,7 @@ def register_routes(app):
                 end_time=end_time
             )
             
-            return jsonify({"success": True, "data": data})
+            return Response(stream_history(data), mimetype='application/json')
         except Exception as e:
             logger.error(f"Temperature history error: {e}")
             return jsonify({"success": False, "error": str(e), "data": []})
@@ -193,7 +209,7 @@ def register_routes(app):
                 end_time=end_time
             )
             
-            return jsonify({"success": True, "data": data})
+            return Response(stream_history(data), mimetype='application/json')
         except Exception as e:
             logger.error(f"Humidity history error: {e}")
             return jsonify({"success": False, "error": str(e), "data": []})
@@ -212,7 +228,7 @@ def register_routes(app):
                 end_time=end_time
             )
             
-            return jsonify({"success": True, "data": data})
+            return Response(stream_history(data), mimetype='application/json')
         except Exception as e:
             logger.error(f"Motion history error: {e}")
             return jsonify({"success": False, "error": str(e), "data": []})
@@ -60,6 +60,14 @@ class Config:
         if os.getenv('EMAIL_TO'):
             self._config['email']['to_email'] = os.getenv('EMAIL_TO')
         
+        # Photo blob storage
+        if os.getenv('PHOTO_BLOB_URL'):
+            self._config['photo_storage'] = self._config.get('photo_storage', {})
+            self._config['photo_storage']['blob_url'] = os.getenv('PHOTO_BLOB_URL')
+        if os.getenv('PHOTO_BLOB_KEY'):
+            self._config['photo_storage'] = self._config.get('photo_storage', {})
+            self._config['photo_storage']['blob_key'] = os.getenv('PHOTO_BLOB_KEY')
+        
         # RFID Keys
         rfid_ids = os.getenv('AUTHORIZED_RFID_IDS', '')
         if rfid_ids:
@@ -120,6 +128,10 @@ class Config:
     def email_config(self) -> Dict[str, Any]:
         return self._config.get('email', {})
     
+    @property
+    def photo_storage(self) -> Dict[str, Any]:
+        return self._config.get('photo_storage', {})
+    
     @property
     def authorized_rfids(self) -> List[int]:
         return self._config.get('authorized_rfids', [])
\ No newline at end of file
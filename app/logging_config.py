@@ -51,6 +51,7 @@ def setup_logging(log_dir: str = "data/logs", log_level: int = logging.INFO):
     
     # Suppress noisy libraries
     logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    logging.getLogger('waitress').setLevel(logging.WARNING)
     logging.getLogger('PIL').setLevel(logging.WARNING)
     
     logging.info("Logging system initialized")
\ No newline at end of file
@@ -19,6 +19,16 @@ from services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
+# Accepted Adafruit IO control values (lowercased)
+_ON_VALUES = frozenset({'1', 'on', 'true'})
+_OFF_VALUES = frozenset({'0', 'off', 'false'})
+_SIREN_ON_VALUES = frozenset({'1', 'on', 'siren', 'true'})
+_SIREN_OFF_VALUES = frozenset({'0', 'off', 'stop', 'false'})
+_SERVO_LOCK_VALUES = frozenset({'lock', 'locked', '1'})
+_SERVO_UNLOCK_VALUES = frozenset({'unlock', 'unlocked', '0'})
+_STEALTH_ON_VALUES = frozenset({'1', 'on', 'true', 'enabled'})
+_STEALTH_OFF_VALUES = frozenset({'0', 'off', 'false', 'disabled'})
+
 class SystemMode(Enum):
     """System operating modes"""
     DISARMED = "disarmed"
@@ -116,11 +126,15 @@ class SecurityStateMachine:
         try:
             # Adafruit IO
             aio_config = self.config.adafruit_io
+            photo_config = self.config.photo_storage
             self.adafruit = AdafruitService(
                 username=aio_config.get('username', ''),
                 key=aio_config.get('key', ''),
                 feeds=aio_config.get('feeds', {}),
-                control_callback=self._handle_adafruit_control
+                control_callback=self._handle_adafruit_control,
+                deadband=aio_config.get('deadband'),
+                blob_url=photo_config.get('blob_url'),
+                blob_key=photo_config.get('blob_key')
             )
             
             # Email Service (Brevo)
@@ -196,7 +210,7 @@ class SecurityStateMachine:
             self._log_event("ARM", f"Source: {source}")
             
             # Notify cloud
-            self._task_queue.put(("publish", ("mode", 1)))
+            self._task_queue.put(("publish", ("mode", 1, 1)))
             
             return True
     
@@ -242,8 +256,8 @@ class SecurityStateMachine:
             self._log_event("DISARM", f"Source: {source}, Previous: {prev_mode.value}")
             
             # Notify cloud
-            self._task_queue.put(("publish", ("mode", 0)))
-            self._task_queue.put(("publish", ("alarm", 0)))
+            self._task_queue.put(("publish", ("mode", 0, 1)))
+            self._task_queue.put(("publish", ("alarm", 0, 1)))
             
             return True
     
@@ -263,10 +277,10 @@ class SecurityStateMachine:
             
             if feed_name == 'led_control':
                 # LED control: on, off, blink, blink-fast
-                if value in ['1', 'on', 'true']:
+                if value in _ON_VALUES:
                     self.led.on()
                     logger.info("LED turned ON via Adafruit IO")
-                elif value in ['0', 'off', 'false']:
+                elif value in _OFF_VALUES:
                     self.led.off()
                     logger.info("LED turned OFF via Adafruit IO")
                 elif value == 'blink':
@@ -278,10 +292,10 @@ class SecurityStateMachine:
             
             elif feed_name == 'buzzer_control':
                 # Buzzer control: on, off, beep, beep-twice, siren
-                if value in ['1', 'on', 'siren', 'true']:
+                if value in _SIREN_ON_VALUES:
                     self.buzzer.start_siren()
                     logger.info("Buzzer siren started via Adafruit IO")
-                elif value in ['0', 'off', 'stop', 'false']:
+                elif value in _SIREN_OFF_VALUES:
                     self.buzzer.stop()
                     logger.info("Buzzer stopped via Adafruit IO")
                 elif value == 'beep':
@@ -293,11 +307,11 @@ class SecurityStateMachine:
             
             elif feed_name == 'servo_control':
                 # Servo control: lock, unlock, or angle (0-180)
-                if value in ['lock', 'locked', '1']:
+                if value in _SERVO_LOCK_VALUES:
                     self.servo.lock()
                     logger.info("Servo locked via Adafruit IO")
                     self._log_event("SERVO_LOCK", "Remote control via Adafruit IO")
-                elif value in ['unlock', 'unlocked', '0']:
+                elif value in _SERVO_UNLOCK_VALUES:
                     self.servo.unlock()
                     logger.info("Servo unlocked via Adafruit IO")
                     self._log_event("SERVO_UNLOCK", "Remote control via Adafruit IO")
@@ -317,11 +331,11 @@ class SecurityStateMachine:
             
             elif feed_name == 'stealth_mode':
                 # Stealth mode control: on/off
-                if value in ['1', 'on', 'true', 'enabled']:
+                if value in _STEALTH_ON_VALUES:
                     self.stealth_mode = True
                     logger.info("Stealth mode ENABLED via Adafruit IO")
                     self._log_event("STEALTH_MODE", "Enabled via Adafruit IO")
-                elif value in ['0', 'off', 'false', 'disabled']:
+                elif value in _STEALTH_OFF_VALUES:
                     self.stealth_mode = False
                     logger.info("Stealth mode DISABLED via Adafruit IO")
                     self._log_event("STEALTH_MODE", "Disabled via Adafruit IO")
@@ -343,7 +357,7 @@ class SecurityStateMachine:
                 return
             
             # Publish motion to cloud
-            self._task_queue.put(("publish", ("motion", 1)))
+            self._task_queue.put(("publish", ("motion", 1, 1)))
             
             if self._mode == SystemMode.ARMED:
                 # Transition to PRE_ALARM
@@ -426,7 +440,7 @@ class SecurityStateMachine:
                             self._log_event("ALARM_TRIGGERED", "Pre-alarm timeout expired")
                             
                             # Notify cloud
-                            self._task_queue.put(("publish", ("alarm", 1)))
+                            self._task_queue.put(("publish", ("alarm", 1, 1)))
                     
                     # ALARM state logic
                     elif mode == SystemMode.ALARM:
@@ -440,7 +454,7 @@ class SecurityStateMachine:
                             self.buzzer.stop()
                             self._led_pattern = LEDPattern.OFF if self._stealth_mode else LEDPattern.SOLID
                             self._log_event("ALARM_RESET", "Duration timeout")
-                            self._task_queue.put(("publish", ("alarm", 0)))
+                            self._task_queue.put(("publish", ("alarm", 0, 1)))
                         
                         # Check if no motion for extended period
                         elif motion_timeout > self.config.logic['motion_timeout_seconds']:
@@ -449,7 +463,7 @@ class SecurityStateMachine:
                             self.buzzer.stop()
                             self._led_pattern = LEDPattern.OFF if self._stealth_mode else LEDPattern.SOLID
                             self._log_event("ALARM_RESET", "Motion timeout")
-                            self._task_queue.put(("publish", ("alarm", 0)))
+                            self._task_queue.put(("publish", ("alarm", 0, 1)))
                 
                 time.sleep(0.1)  # 100ms tick
                 
@@ -497,16 +511,15 @@ class SecurityStateMachine:
         logger.info("LED control loop stopped")
     
     def _loop_motion_sensor(self):
-        """PIR motion sensor polling loop"""
+        """PIR motion sensor event loop"""
         logger.info("Motion sensor loop started")
         
         while self._running:
             try:
-                if self.pir.motion_detected():
+                # Sleeps in epoll until an edge arrives; timeout only to notice stop()
+                if self.pir.wait_motion(timeout=1.0):
                     self.handle_motion()
                 
-                time.sleep(self.config.logic.get('read_interval_seconds', 0.5))
-                
             except Exception as e:
                 logger.error(f"Error in motion sensor loop: {e}", exc_info=True)
                 time.sleep(1)
@@ -544,8 +557,7 @@ class SecurityStateMachine:
                     logger.debug(f"Environment: {temp}°C, {humidity}%")
                     
                     # Publish to cloud
-                    self._task_queue.put(("publish", ("temperature", temp)))
-                    self._task_queue.put(("publish", ("humidity", humidity)))
+                    self._task_queue.put(("publish_batch", [("temperature", temp), ("humidity", humidity)]))
                 
                 time.sleep(60)  # Read every minute
                 
@@ -567,8 +579,11 @@ class SecurityStateMachine:
                 
                 # Process task
                 if task_type == "publish":
-                    feed_key, value = task_data
-                    self.adafruit.publish(feed_key, value)
+                    # (feed_key, value) or (feed_key, value, qos)
+                    self.adafruit.publish(*task_data)
+                
+                elif task_type == "publish_batch":
+                    self.adafruit.publish_batch(task_data)
                 
                 elif task_type == "capture_photo":
                     reason = task_data
@@ -595,14 +610,14 @@ class SecurityStateMachine:
     def _capture_and_upload_photo(self, reason: str):
         """Capture photo and upload to Adafruit IO"""
         try:
-            filename = self.camera.capture()
+            filename, jpeg_bytes = self.camera.capture()
             self._last_photo_time = time.time()
             
             logger.info(f"Photo captured: {filename} (Reason: {reason})")
             self._log_event("PHOTO", f"{reason}: {filename}")
             
-            # Upload to Adafruit IO (base64 encoded)
-            self.adafruit.upload_photo(filename, self.camera.storage_dir / filename)
+            # Upload to blob storage / Adafruit IO
+            self.adafruit.upload_photo(filename, image_data=jpeg_bytes)
             
         except Exception as e:
             logger.error(f"Failed to capture/upload photo: {e}", exc_info=True)
@@ -660,9 +675,10 @@ Please check your dashboard immediately.
     
     def get_status(self) -> Dict[str, Any]:
         """Get current system status"""
+        # Read outside the lock so a slow DHT read doesn't stall the state machine
+        temp, humidity = self.dht.read()
+        
         with self._lock:
-            temp, humidity = self.dht.read()
-            
             return {
                 "status": {
                     "mode": self._mode.value,
@@ -728,6 +744,9 @@ Please check your dashboard immediately.
         
         # Cleanup hardware
         try:
+            self.pir.cleanup()
+            self.dht.cleanup()
+            self.camera.cleanup()
             self.led.cleanup()
             self.buzzer.cleanup()
             self.servo.cleanup()
@@ -737,5 +756,6 @@ Please check your dashboard immediately.
         
         # Disconnect services
         self.adafruit.disconnect()
+        self.email.close()
         
         logger.info("State machine stopped")
\ No newline at end of file
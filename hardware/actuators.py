@@ -4,8 +4,8 @@ LED, Buzzer, Servo Motor
 """
 import logging
 import time
-import math
 import threading
+import numpy as np
 from gpiozero import LED as GPIOZeroLED, AngularServo, PWMOutputDevice
 
 logger = logging.getLogger(__name__)
@@ -55,6 +55,11 @@ class LED:
 class Buzzer:
     """Active Buzzer with PWM"""
     
+    # One siren sweep: 2000 Hz +/- 500 Hz sine, 2 degree steps
+    SIREN_FREQUENCIES = tuple(
+        (2000 + 500 * np.sin(np.radians(np.arange(0, 361, 2)))).astype(int).tolist()
+    )
+    
     def __init__(self, gpio_pin: int, frequency: int = 2000):
         """
         Initialize buzzer
@@ -116,13 +121,10 @@ class Buzzer:
         """Background siren loop with sine wave modulation"""
         try:
             while self._siren_running:
-                for x in range(0, 361, 2):  # Step by 2 for performance
+                for frequency in self.SIREN_FREQUENCIES:
                     if not self._siren_running:
                         break
                     
-                    sin_val = math.sin(x * (math.pi / 180))
-                    frequency = 2000 + sin_val * 500
-                    
                     self.buzzer.frequency = frequency
                     self.buzzer.value = 0.5
                     time.sleep(0.002)
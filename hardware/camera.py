@@ -1,17 +1,22 @@
 """
 USB Camera Module
 """
+import os
+import time
 import logging
 import cv2
 import threading
 from pathlib import Path
-from datetime import datetime, timezone
+from typing import Tuple
 
 logger = logging.getLogger(__name__)
 
 class Camera:
     """USB Camera for capturing images"""
     
+    # Frames discarded after opening the device
+    WARMUP_FRAMES = 5
+    
     def __init__(self, device_index: int = 0, width: int = 1280, height: int = 720, 
                  storage_dir: str = "data/images"):
         """
@@ -28,57 +33,119 @@ class Camera:
         self.height = height
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self._storage_dir_str = str(self.storage_dir.resolve()) + os.sep
+        
+        # Quality 85 + optimized Huffman tables: roughly half the size of the default 95
+        self._jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
         
         self._lock = threading.Lock()  # Camera is not thread-safe
+        self._cap = None
+        
+        # Open now so the first (alarm) photo doesn't pay the open/warm-up cost;
+        # capture() retries if the camera isn't available yet
+        try:
+            self._cap = self._open()
+        except RuntimeError as e:
+            logger.warning(f"Camera not opened at startup: {e}")
         
         logger.info(f"Camera initialized: device {device_index}, {width}x{height}")
     
-    def capture(self) -> str:
+    def _open(self):
+        """Open the V4L2 device with a single-frame buffer"""
+        cap = cv2.VideoCapture(self.device_index, cv2.CAP_V4L2)
+        
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError("Camera not available")
+        
+        # Keep only the newest frame queued so reads are never stale
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        # Camera-side MJPEG: compressed frames over USB instead of raw YUYV
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        
+        # Set resolution
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        
+        # Let auto-exposure settle on the fresh stream (once per open)
+        for _ in range(self.WARMUP_FRAMES):
+            cap.read()
+        
+        return cap
+    
+    def capture(self) -> Tuple[str, bytes]:
         """
         Capture a single image
         
+        The JPEG is returned in memory; writing it to storage_dir happens in
+        the background so callers don't wait on the SD card.
+        
         Returns:
-            Filename of captured image
+            Tuple of (filename, jpeg_bytes)
         
         Raises:
             RuntimeError: If capture fails
         """
         with self._lock:
-            cap = None
             try:
-                cap = cv2.VideoCapture(self.device_index)
-                
-                if not cap.isOpened():
-                    raise RuntimeError("Camera not available")
-                
-                # Set resolution
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                # Device stays open between captures (open costs ~500 ms on a Pi)
+                if self._cap is None:
+                    self._cap = self._open()
                 
-                # Let auto-exposure settle by reading a few frames
-                for _ in range(5):
-                    cap.read()
-                
-                # Capture frame
-                success, frame = cap.read()
+                # Drop the queued frame, then read a fresh one
+                self._cap.grab()
+                success, frame = self._cap.read()
                 if not success:
                     raise RuntimeError("Failed to read frame from camera")
                 
-                # Generate filename
-                timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-                filename = f"capture_{timestamp}.jpg"
-                filepath = self.storage_dir / filename
+                # Generate filename (UTC)
+                filename = f"capture_{time.strftime('%Y%m%d_%H%M%S', time.gmtime())}.jpg"
+                
+                # Encode in memory
+                ok, buf = cv2.imencode('.jpg', frame, self._jpeg_params)
+                if not ok:
+                    raise RuntimeError("Failed to encode frame")
+                jpeg_bytes = buf.tobytes()
                 
-                # Save image
-                cv2.imwrite(str(filepath), frame)
+                # Save image (fire-and-forget)
+                threading.Thread(
+                    target=self._write_file,
+                    args=(self._storage_dir_str + filename, jpeg_bytes),
+                    daemon=True
+                ).start()
                 
                 logger.info(f"Image captured: {filename}")
-                return filename
+                return filename, jpeg_bytes
                 
             except Exception as e:
                 logger.error(f"Camera capture failed: {e}", exc_info=True)
+                # Reopen on next capture (device may have been unplugged)
+                self._release()
                 raise RuntimeError(f"Camera capture failed: {e}")
-            
-            finally:
-                if cap:
-                    cap.release()
\ No newline at end of file
+    
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        """Write captured image to disk (atomically, via a temp file)"""
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to save image {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def _release(self):
+        """Release the capture device"""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+    
+    def cleanup(self):
+        """Release camera resources"""
+        with self._lock:
+            self._release()
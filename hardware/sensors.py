@@ -2,49 +2,167 @@
 Sensor Hardware Modules
 PIR Motion Sensor, DHT Temperature/Humidity, RFID Reader
 """
+import os
+import glob
+import fcntl
+import select
+import struct
 import logging
 import time
-import board
-import adafruit_dht
+import threading
+import pigpio
 import RPi.GPIO as GPIO
-from gpiozero import MotionSensor
 from mfrc522 import SimpleMFRC522
+from pigpio_dht import DHT11
 
 logger = logging.getLogger(__name__)
 
+# Linux GPIO character device uAPI (v2), see <linux/gpio.h>
+GPIO_V2_GET_LINE_IOCTL = 0xC250B407
+GPIO_V2_LINE_GET_VALUES_IOCTL = 0xC010B40E
+GPIO_V2_LINE_FLAG_INPUT = 1 << 2
+GPIO_V2_LINE_FLAG_EDGE_RISING = 1 << 4
+GPIO_V2_LINE_FLAG_EDGE_FALLING = 1 << 5
+GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN = 1 << 9
+GPIO_V2_LINE_EVENT_RISING_EDGE = 1
+
+# struct gpio_v2_line_request: offsets[64], consumer[32], line_config (flags,
+# num_attrs, padding[5], attrs[10]), num_lines, event_buffer_size, padding[5], fd
+_LINE_REQUEST = struct.Struct("<64I32sQI5I240xII5Ii")
+# struct gpio_v2_line_event: timestamp_ns, id, offset, seqno, line_seqno, padding[6]
+_LINE_EVENT = struct.Struct("<QIIII24x")
+# struct gpio_v2_line_values: bits, mask
+_LINE_VALUES = struct.Struct("<QQ")
+
 class PIRSensor:
-    """PIR Motion Sensor"""
+    """PIR Motion Sensor (kernel GPIO line events)"""
     
-    def __init__(self, gpio_pin: int, debounce_time: float = 1.0):
+    def __init__(self, gpio_pin: int, debounce_time: float = 1.0,
+                 chip_path: str = "/dev/gpiochip0"):
         """
         Initialize PIR sensor
         
         Args:
             gpio_pin: BCM GPIO pin number
             debounce_time: Minimum time between motion detections (seconds)
+            chip_path: GPIO character device the pin belongs to
         """
         self.gpio_pin = gpio_pin
         self.debounce_time = debounce_time
-        self.sensor = MotionSensor(gpio_pin, queue_len=1, sample_rate=100, threshold=0.5)
-        self._last_detection = 0
-        logger.info(f"PIR sensor initialized on GPIO {gpio_pin}")
+        self._debounce_ns = int(debounce_time * 1e9)
+        self._last_report_ns = None
+        
+        self._line_fd = self._request_line(chip_path, gpio_pin)
+        self._level_high = self._read_level()
+        self._epoll = select.epoll()
+        self._epoll.register(self._line_fd, select.EPOLLIN)
+        logger.info(f"PIR sensor initialized on GPIO {gpio_pin} ({chip_path})")
+    
+    @staticmethod
+    def _request_line(chip_path: str, gpio_pin: int) -> int:
+        """Request the pin as a pulled-down, both-edges input line, returns the line fd"""
+        offsets = [gpio_pin] + [0] * 63
+        request = bytearray(_LINE_REQUEST.pack(
+            *offsets,
+            b"anlex-guard-pir",
+            GPIO_V2_LINE_FLAG_INPUT | GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN |
+            GPIO_V2_LINE_FLAG_EDGE_RISING | GPIO_V2_LINE_FLAG_EDGE_FALLING,
+            0, 0, 0, 0, 0, 0,   # num_attrs, padding
+            1, 0,               # num_lines, event_buffer_size (kernel default)
+            0, 0, 0, 0, 0,      # padding
+            -1                  # fd (filled in by the kernel)
+        ))
+        
+        chip_fd = os.open(chip_path, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            fcntl.ioctl(chip_fd, GPIO_V2_GET_LINE_IOCTL, request, True)
+        finally:
+            os.close(chip_fd)
+        
+        return _LINE_REQUEST.unpack(request)[-1]
+    
+    def _read_level(self) -> bool:
+        """Read the current line level (PIR output already high at startup)"""
+        values = bytearray(_LINE_VALUES.pack(0, 1))
+        fcntl.ioctl(self._line_fd, GPIO_V2_LINE_GET_VALUES_IOCTL, values, True)
+        return bool(_LINE_VALUES.unpack(values)[0] & 1)
+    
+    def _debounce_elapsed(self, timestamp_ns: int) -> bool:
+        """Check if debounce_time has passed since the last reported motion"""
+        return (self._last_report_ns is None or
+                timestamp_ns - self._last_report_ns >= self._debounce_ns)
+    
+    def wait_motion(self, timeout: float = None) -> bool:
+        """
+        Block until motion is detected
+        
+        Reports a debounced rising edge, and while the PIR output stays high
+        (continuous motion) reports again once per debounce_time.
+        
+        Args:
+            timeout: Maximum wait (seconds), None to wait forever, 0 to poll
+        
+        Returns:
+            True if motion detected, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        while True:
+            # Event timestamps are CLOCK_MONOTONIC, same as time.monotonic_ns()
+            wait = None
+            if self._level_high:
+                now_ns = time.monotonic_ns()
+                if self._debounce_elapsed(now_ns):
+                    self._last_report_ns = now_ns
+                    return True
+                wait = (self._last_report_ns + self._debounce_ns - now_ns) / 1e9
+            
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+                wait = remaining if wait is None else min(wait, remaining)
+            
+            detected = False
+            if self._epoll.poll(-1 if wait is None else wait):
+                data = os.read(self._line_fd, _LINE_EVENT.size * 16)
+                for offset in range(0, len(data), _LINE_EVENT.size):
+                    timestamp_ns, event_id = _LINE_EVENT.unpack_from(data, offset)[:2]
+                    self._level_high = event_id == GPIO_V2_LINE_EVENT_RISING_EDGE
+                    
+                    # Debounce on the kernel's hardware event timestamp
+                    if self._level_high and self._debounce_elapsed(timestamp_ns):
+                        self._last_report_ns = timestamp_ns
+                        detected = True
+            
+            if detected:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
     
     def motion_detected(self) -> bool:
         """
-        Check if motion is detected with debouncing
+        Check if motion was detected (non-blocking)
         
         Returns:
             True if motion detected, False otherwise
         """
-        if self.sensor.motion_detected:
-            now = time.time()
-            if now - self._last_detection >= self.debounce_time:
-                self._last_detection = now
-                return True
-        return False
+        return self.wait_motion(timeout=0)
+    
+    def cleanup(self):
+        """Release the GPIO line"""
+        self._epoll.close()
+        os.close(self._line_fd)
 
 class DHTSensor:
-    """DHT11/DHT22 Temperature and Humidity Sensor"""
+    """
+    DHT11 Temperature and Humidity Sensor
+    
+    Uses the kernel dht11 IIO driver when its overlay is loaded
+    (dtoverlay=dht11,gpiopin=N), otherwise pigpio DMA-timed reads.
+    """
+    
+    # DHT11 cannot sample faster than 1 Hz
+    MIN_READ_INTERVAL = 1.0
+    IIO_DEVICES = "/sys/bus/iio/devices/iio:device*"
     
     def __init__(self, board_pin: str = "D4"):
         """
@@ -54,42 +172,116 @@ class DHTSensor:
             board_pin: Board pin designation (e.g., "D4" for GPIO4)
         """
         self.board_pin = board_pin
+        self.gpio_pin = int(board_pin.lstrip("D"))
+        self._pi = None
         self._sensor = None
-        logger.info(f"DHT sensor initialized on {board_pin}")
+        
+        self._lock = threading.Lock()  # Status API and sensor loop both read
+        self._last_read = float("-inf")
+        self._cached = (None, None)
+        
+        self._iio_fds = self._open_iio()
+        backend = "kernel IIO" if self._iio_fds else "pigpio"
+        logger.info(f"DHT sensor initialized on {board_pin} ({backend})")
+    
+    def _open_iio(self):
+        """Open the dht11 IIO channel files, returns (temp_fd, humidity_fd) or None"""
+        for device in sorted(glob.glob(self.IIO_DEVICES)):
+            try:
+                with open(os.path.join(device, "name")) as f:
+                    if f.read().strip() != "dht11":
+                        continue
+                temp_fd = os.open(os.path.join(device, "in_temp_input"), os.O_RDONLY)
+                try:
+                    humidity_fd = os.open(os.path.join(device, "in_humidityrelative_input"), os.O_RDONLY)
+                except OSError:
+                    os.close(temp_fd)
+                    raise
+                return temp_fd, humidity_fd
+            except OSError as e:
+                logger.warning(f"DHT IIO device {device} unusable: {e}")
+        return None
     
     def read(self) -> tuple:
         """
         Read temperature and humidity
         
+        Calls within MIN_READ_INTERVAL of the previous read return its result.
+        
         Returns:
             Tuple of (temperature_celsius, humidity_percent) or (None, None) on error
         """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_read < self.MIN_READ_INTERVAL:
+                return self._cached
+            
+            self._last_read = now
+            self._cached = self._read_sensor()
+            return self._cached
+    
+    def _read_sensor(self) -> tuple:
+        """Perform one sensor transaction"""
+        if self._iio_fds:
+            return self._read_iio()
+        
         try:
-            # Lazy initialization (DHT sensors can be finicky)
+            # Lazy initialization (requires the pigpiod daemon)
             if self._sensor is None:
-                pin_obj = getattr(board, self.board_pin)
-                self._sensor = adafruit_dht.DHT11(pin_obj)
+                self._pi = pigpio.pi()
+                if not self._pi.connected:
+                    raise ConnectionError("pigpiod daemon not running")
+                self._sensor = DHT11(self.gpio_pin, pi=self._pi)
             
-            temperature = self._sensor.temperature
-            humidity = self._sensor.humidity
+            result = self._sensor.read()
             
-            if temperature is None or humidity is None:
+            if not result.get('valid'):
                 return None, None
             
-            return float(temperature), float(humidity)
+            return float(result['temp_c']), float(result['humidity'])
             
-        except RuntimeError as e:
-            # DHT sensors commonly throw RuntimeError for checksum/timeout
+        except (RuntimeError, TimeoutError) as e:
+            # No response / bad checksum from the sensor
             logger.debug(f"DHT read error (normal): {e}")
             return None, None
             
+        except OSError as e:
+            logger.error(f"DHT connection error: {e}")
+            # Reconnect to pigpiod on next read
+            if self._pi:
+                self._pi.stop()
+            self._pi = None
+            self._sensor = None
+            return None, None
+            
         except Exception as e:
-            logger.error(f"DHT critical error: {e}", exc_info=True)
-            # Reset sensor on critical error
-            if self._sensor:
-                self._sensor.exit()
-                self._sensor = None
+            logger.error(f"DHT read failed: {e}", exc_info=True)
             return None, None
+    
+    def _read_iio(self) -> tuple:
+        """Read from the kernel driver (values in milli-units)"""
+        temp_fd, humidity_fd = self._iio_fds
+        try:
+            temperature = int(os.pread(temp_fd, 16, 0)) / 1000.0
+            humidity = int(os.pread(humidity_fd, 16, 0)) / 1000.0
+            return temperature, humidity
+            
+        except (OSError, ValueError) as e:
+            # Driver returns EIO/ETIMEDOUT on checksum or timing failures
+            logger.debug(f"DHT read error (normal): {e}")
+            return None, None
+    
+    def cleanup(self):
+        """Release sensor resources"""
+        with self._lock:
+            if self._iio_fds:
+                for fd in self._iio_fds:
+                    os.close(fd)
+                self._iio_fds = None
+            if self._pi:
+                self._pi.stop()
+                self._pi = None
+                self._sensor = None
 
 class RFIDReader:
     """MFRC522 RFID Reader"""
@@ -102,13 +294,16 @@ class RFIDReader:
     
     def read(self) -> int:
         """
-        Read RFID tag ID (blocking)
+        Read RFID tag ID (non-blocking)
+        
+        Only the UID is needed, so this stops after REQA + anticollision
+        instead of authenticating and reading the data blocks.
         
         Returns:
-            Tag ID as integer, or None if read failed
+            Tag ID as integer, or None if no card / read failed
         """
         try:
-            tag_id, _ = self.reader.read_no_block()
+            tag_id = self.reader.read_id_no_block()
             if tag_id:
                 logger.info(f"RFID tag read: {tag_id}")
                 return tag_id
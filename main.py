@@ -6,6 +6,7 @@ import sys
 import signal
 import logging
 from pathlib import Path
+from waitress import serve
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -57,13 +58,10 @@ def main():
         global flask_app
         flask_app = create_app(config, state_machine)
         
-        logger.info("Starting Flask web server on http://0.0.0.0:5000")
-        flask_app.run(
-            host='0.0.0.0',
-            port=5000,
-            debug=False,
-            use_reloader=False  # Critical: prevents GPIO double-init
-        )
+        # Production WSGI server, in-process so GPIO singletons are shared
+        # (a pre-fork server would re-initialize the hardware per worker)
+        logger.info("Starting web server on http://0.0.0.0:5000")
+        serve(flask_app, host='0.0.0.0', port=5000, threads=4)
         
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
@@ -3,21 +3,35 @@ Adafruit IO Service
 MQTT publishing and photo upload
 """
 import ssl
-import json
 import time
 import logging
 import base64
+import threading
+import orjson
 import paho.mqtt.client as mqtt
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 class AdafruitService:
     """Adafruit IO MQTT and REST API client"""
     
-    def __init__(self, username: str, key: str, feeds: Dict[str, str], control_callback=None):
+    # Minimum change before a numeric feed is republished
+    DEFAULT_DEADBAND = {'temperature': 0.2, 'humidity': 1.0}
+    # Republish unchanged values at least this often (seconds)
+    DEADBAND_MAX_AGE = 300
+    # How long history responses are served from memory (seconds)
+    HISTORY_CACHE_TTL = 10.0
+    # Blob PUT (connect, read) timeout; runs on the task-processor thread
+    BLOB_TIMEOUT = (3.0, 5.0)
+    
+    def __init__(self, username: str, key: str, feeds: Dict[str, str], control_callback=None,
+                 deadband: Optional[Dict[str, float]] = None,
+                 blob_url: Optional[str] = None, blob_key: Optional[str] = None):
         """
         Initialize Adafruit IO service
         
@@ -26,16 +40,29 @@ class AdafruitService:
             key: Adafruit IO key
             feeds: Dictionary mapping feed names to feed keys
             control_callback: Callback function for control commands (feed_name, value)
+            deadband: Per-feed minimum change to republish (defaults to DEFAULT_DEADBAND)
+            blob_url: Base URL photos are PUT to (optional, see upload_photo)
+            blob_key: Bearer token for the blob store
         """
         self.username = username
         self.key = key
         self.feeds = feeds
+        self._topics = {name: f"{username}/feeds/{feed_key}" for name, feed_key in feeds.items()}
+        self._feed_name_by_key = {feed_key: name for name, feed_key in feeds.items()}
+        self._data_urls = {
+            name: f"https://io.adafruit.com/api/v2/{username}/feeds/{feed_key}/data"
+            for name, feed_key in feeds.items()
+        }
         self.host = "io.adafruit.com"
         self.port = 8883
         self.control_callback = control_callback
         
         self._connected = False
         
+        # Dead-band filter state: feed_name -> (value, monotonic time)
+        self._deadband = dict(self.DEFAULT_DEADBAND if deadband is None else deadband)
+        self._last_pub: Dict[str, Tuple[Any, float]] = {}
+        
         # MQTT Client
         client_id = f"anlex-guard-{int(time.time())}"
         self.client = mqtt.Client(
@@ -52,8 +79,33 @@ class AdafruitService:
         self.client.on_disconnect = self._on_disconnect
         self.client.on_message = self._on_message
         
+        # REST client (keep-alive connection pool for io.adafruit.com)
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.2,
+                              status_forcelist=(429, 500, 502, 503, 504))
+        ))
+        self._headers_get = {'X-AIO-Key': key}
+        
+        # History cache: (feed_name, start, end, limit) -> (expires_at, data)
+        self._history_cache: Dict[tuple, Tuple[float, list]] = {}
+        self._history_lock = threading.Lock()
+        
+        # Photo blob storage
+        self._blob_url = blob_url.rstrip('/') if blob_url else None
+        self._headers_blob = {'Content-Type': 'image/jpeg'}
+        if blob_key:
+            self._headers_blob['Authorization'] = f"Bearer {blob_key}"
+        # Separate session without retries so a slow store fails fast
+        # instead of holding up alarm publishes behind it
+        self._blob_http = requests.Session()
+        self._blob_http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+        
         # Control feeds to subscribe to
         self._control_feeds = ['led_control', 'buzzer_control', 'servo_control', 'stealth_mode']
+        self._control_feeds_set = frozenset(self._control_feeds)
         
         logger.info("Adafruit IO service initialized")
     
@@ -65,9 +117,8 @@ class AdafruitService:
             
             # Subscribe to control feeds
             for feed_name in self._control_feeds:
-                feed_key = self.feeds.get(feed_name)
-                if feed_key:
-                    topic = f"{self.username}/feeds/{feed_key}"
+                topic = self._topics.get(feed_name)
+                if topic:
                     self.client.subscribe(topic, qos=1)
                     logger.info(f"Subscribed to control feed: {feed_name}")
         else:
@@ -81,34 +132,25 @@ class AdafruitService:
     def _on_message(self, client, userdata, msg):
         """MQTT message received callback"""
         try:
-            # Parse topic to get feed key
-            topic_parts = msg.topic.split('/')
-            if len(topic_parts) >= 3:
-                feed_key = topic_parts[2]
+            # Topic is "<username>/feeds/<feed_key>"
+            feed_key = msg.topic.rpartition('/')[2]
+            feed_name = self._feed_name_by_key.get(feed_key)
+            
+            if feed_name in self._control_feeds_set:
+                # Control feeds mostly carry plain ON/OFF/0/1; only parse JSON objects
+                payload = msg.payload
+                value = payload.decode('utf-8', 'replace')
+                if payload[:1] == b'{':
+                    try:
+                        value = orjson.loads(payload).get('value', value)
+                    except orjson.JSONDecodeError:
+                        pass
                 
-                # Find feed name from feed key
-                feed_name = None
-                for name, key in self.feeds.items():
-                    if key == feed_key:
-                        feed_name = name
-                        break
+                logger.info(f"Control command received: {feed_name} = {value}")
                 
-                if feed_name and feed_name in self._control_feeds:
-                    # Parse payload
-                    payload = msg.payload.decode('utf-8')
-                    
-                    # Try to parse JSON, fallback to plain string
-                    try:
-                        data = json.loads(payload)
-                        value = data.get('value', payload)
-                    except json.JSONDecodeError:
-                        value = payload
-                    
-                    logger.info(f"Control command received: {feed_name} = {value}")
-                    
-                    # Call control callback
-                    if self.control_callback:
-                        self.control_callback(feed_name, value)
+                # Call control callback
+                if self.control_callback:
+                    self.control_callback(feed_name, value)
                     
         except Exception as e:
             logger.error(f"Error processing MQTT message: {e}", exc_info=True)
@@ -127,68 +169,138 @@ class AdafruitService:
         try:
             self.client.loop_stop()
             self.client.disconnect()
+            self._http.close()
+            self._blob_http.close()
             logger.info("Adafruit IO disconnected")
         except Exception:
             pass
     
-    def publish(self, feed_name: str, value: Any):
+    def _within_deadband(self, feed_name: str, value: Any, now: float) -> bool:
+        """Check if a numeric value is too close to the last published one"""
+        band = self._deadband.get(feed_name)
+        prev = self._last_pub.get(feed_name)
+        if band is None or prev is None or not isinstance(value, (int, float)):
+            return False
+        return abs(value - prev[0]) < band and now - prev[1] < self.DEADBAND_MAX_AGE
+    
+    def publish(self, feed_name: str, value: Any, qos: int = 0):
         """
         Publish data to Adafruit IO feed
         
         Args:
             feed_name: Feed name (from feeds config)
             value: Value to publish
+            qos: MQTT QoS (0 for telemetry, 1 for alarm/state events)
+        
+        Returns:
+            True if published (or unchanged within the dead-band), False otherwise
         """
         if not self._connected:
             logger.debug("Adafruit IO not connected, skipping publish")
-            return
+            return False
         
-        feed_key = self.feeds.get(feed_name)
-        if not feed_key:
+        topic = self._topics.get(feed_name)
+        if not topic:
             logger.warning(f"Unknown feed: {feed_name}")
-            return
+            return False
+        
+        now = time.monotonic()
+        if self._within_deadband(feed_name, value, now):
+            logger.debug(f"Skipping unchanged {feed_name}: {value}")
+            return True
         
         try:
-            topic = f"{self.username}/feeds/{feed_key}"
-            payload = json.dumps({"value": value})
+            payload = orjson.dumps({"value": value})
             
-            result = self.client.publish(topic, payload=payload, qos=1)
+            result = self.client.publish(topic, payload=payload, qos=qos)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                self._last_pub[feed_name] = (value, now)
                 logger.debug(f"Published to {feed_name}: {value}")
-            else:
-                logger.warning(f"Publish failed: rc={result.rc}")
+                return True
+            
+            logger.warning(f"Publish failed: rc={result.rc}")
+            return False
+                
+        except Exception as e:
+            logger.error(f"MQTT publish error: {e}")
+            return False
+    
+    def publish_batch(self, items: List[Tuple[str, Any]], qos: int = 0):
+        """
+        Publish several feed values back to back
+        
+        Args:
+            items: List of (feed_name, value) pairs
+            qos: MQTT QoS for all items
+        """
+        if not self._connected:
+            logger.debug("Adafruit IO not connected, skipping publish")
+            return
+        
+        now = time.monotonic()
+        sent = []
+        try:
+            for feed_name, value in items:
+                topic = self._topics.get(feed_name)
+                if not topic:
+                    logger.warning(f"Unknown feed: {feed_name}")
+                    continue
+                if self._within_deadband(feed_name, value, now):
+                    continue
                 
+                result = self.client.publish(topic, payload=orjson.dumps({"value": value}), qos=qos)
+                if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                    self._last_pub[feed_name] = (value, now)
+                    sent.append((feed_name, value))
+                else:
+                    logger.warning(f"Publish failed: rc={result.rc}")
+            
+            if sent:
+                logger.debug(f"Published batch: {sent}")
+            
         except Exception as e:
             logger.error(f"MQTT publish error: {e}")
     
-    def upload_photo(self, filename: str, filepath: Path):
+    def upload_photo(self, filename: str, filepath: Optional[Path] = None,
+                     image_data: Optional[bytes] = None):
         """
-        Upload photo to Adafruit IO (base64 encoded to a feed)
+        Upload photo
         
-        Note: Adafruit IO has size limits. For production, use dedicated image storage.
+        With blob storage configured, the raw JPEG is PUT there and only its URL
+        is published to the photos feed. Otherwise (or if that upload fails) the
+        image is base64 encoded into the feed, subject to Adafruit IO's size limit.
         
         Args:
             filename: Name of the file
-            filepath: Path to the image file
+            filepath: Path to the image file (used when image_data is not given)
+            image_data: JPEG bytes already in memory
         """
         try:
-            # Read and encode image
-            with open(filepath, 'rb') as f:
-                image_data = f.read()
+            if self._blob_url:
+                if image_data is None:
+                    image_data = Path(filepath).read_bytes()
+                if self._upload_blob(filename, image_data):
+                    return
             
-            # Check size (Adafruit IO has ~100KB limit per value)
-            if len(image_data) > 100000:
-                logger.warning(f"Image too large for Adafruit IO: {len(image_data)} bytes")
+            # Check encoded size before reading (Adafruit IO has ~100KB limit per value)
+            size = len(image_data) if image_data is not None else Path(filepath).stat().st_size
+            b64_size = 4 * ((size + 2) // 3)
+            if b64_size > 100000:
+                logger.warning(f"Image too large for Adafruit IO: {size} bytes ({b64_size} encoded)")
                 return
             
-            b64_data = base64.b64encode(image_data).decode('utf-8')
+            if image_data is not None:
+                b64_data = base64.b64encode(image_data).decode('ascii')
+            else:
+                # Read and encode image (raw bytes are dropped right after encoding)
+                with open(filepath, 'rb') as f:
+                    b64_data = base64.b64encode(f.read()).decode('ascii')
             
             # Publish to a dedicated photo feed
-            photo_feed = self.feeds.get('photos', 'photos')
-            topic = f"{self.username}/feeds/{photo_feed}"
+            topic = self._topics.get('photos', f"{self.username}/feeds/photos")
             
-            payload = json.dumps({
+            payload = orjson.dumps({
                 "value": filename,
                 "metadata": {"image": b64_data}
             })
@@ -199,11 +311,41 @@ class AdafruitService:
         except Exception as e:
             logger.error(f"Failed to upload photo: {e}")
     
+    def _upload_blob(self, filename: str, image_data: bytes) -> bool:
+        """
+        PUT a photo to blob storage and publish its URL
+        
+        Returns:
+            True if uploaded and the URL was published, False otherwise
+        """
+        url = f"{self._blob_url}/{filename}"
+        try:
+            response = self._blob_http.put(url, data=image_data, headers=self._headers_blob,
+                                          timeout=self.BLOB_TIMEOUT)
+            
+            if response.status_code in (200, 201):
+                photo_url = response.headers.get('Location') or url
+                if not self.publish('photos', photo_url, qos=1):
+                    logger.warning(f"Photo stored but URL not published: {photo_url}")
+                    return False
+                logger.info(f"Photo uploaded to blob storage: {filename}")
+                return True
+            
+            logger.error(f"Blob upload failed: {response.status_code}")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Blob upload error: {e}")
+            return False
+    
     def get_historical_data(self, feed_name: str, start_time: str = None, 
                            end_time: str = None, limit: int = 1000) -> list:
         """
         Fetch historical data from Adafruit IO REST API
         
+        Results are cached for HISTORY_CACHE_TTL so repeated dashboard polls
+        don't each cost a round-trip (and Adafruit IO rate limit).
+        
         Args:
             feed_name: Feed name
             start_time: ISO format start time
@@ -213,30 +355,68 @@ class AdafruitService:
         Returns:
             List of data points
         """
-        feed_key = self.feeds.get(feed_name)
-        if not feed_key:
+        url = self._data_urls.get(feed_name)
+        if not url:
             logger.warning(f"Unknown feed: {feed_name}")
             return []
         
+        cache_key = (feed_name, start_time, end_time, limit)
+        now = time.monotonic()
+        with self._history_lock:
+            cached = self._history_cache.get(cache_key)
+            if cached and cached[0] > now:
+                return cached[1]
+        
         try:
-            url = f"https://io.adafruit.com/api/v2/{self.username}/feeds/{feed_key}/data"
-            
-            params = {'limit': min(limit, 1000)}
+            params = {}
             if start_time:
                 params['start_time'] = start_time
             if end_time:
                 params['end_time'] = end_time
             
-            headers = {'X-AIO-Key': self.key}
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            # API returns newest first, max 1000 per page; page back via end_time
+            data = []
+            seen = set()
+            repeated = 0
+            complete = True
+            while len(data) < limit:
+                # end_time is inclusive and created_at has one-second resolution,
+                # so later pages repeat every row from the boundary second
+                params['limit'] = min(limit - len(data) + repeated, 1000)
+                response = self._http.get(url, params=params, headers=self._headers_get, timeout=10)
+                
+                if response.status_code != 200:
+                    logger.error(f"Adafruit IO API error: {response.status_code}")
+                    complete = False
+                    break
+                
+                page = orjson.loads(response.content)
+                last_page = len(page) < params['limit']
+                skip = 0
+                while skip < len(page) and page[skip].get('id') in seen:
+                    skip += 1
+                page = page[skip:limit - len(data) + skip]
+                data.extend(page)
+                seen.update(row.get('id') for row in page)
+                
+                if last_page or not page:
+                    break
+                boundary = page[-1]['created_at']
+                repeated = sum(1 for row in page if row.get('created_at') == boundary)
+                if boundary == params.get('end_time'):
+                    repeated += skip  # Boundary second spans more than one page
+                params['end_time'] = boundary
             
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"Retrieved {len(data)} data points from {feed_name}")
-                return data
-            else:
-                logger.error(f"Adafruit IO API error: {response.status_code}")
-                return []
+            logger.info(f"Retrieved {len(data)} data points from {feed_name}")
+            
+            if complete:
+                with self._history_lock:
+                    # Drop expired entries so distinct time ranges don't accumulate
+                    for k in [k for k, (expires, _) in self._history_cache.items() if expires <= now]:
+                        del self._history_cache[k]
+                    self._history_cache[cache_key] = (now + self.HISTORY_CACHE_TTL, data)
+            
+            return data
                 
         except Exception as e:
             logger.error(f"Failed to fetch data from Adafruit IO: {e}")
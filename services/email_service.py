@@ -3,6 +3,7 @@ Email Notification Service using Brevo (SendinBlue) API
 """
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -26,6 +27,26 @@ class EmailService:
         
         self.enabled = bool(api_key and from_email and to_email)
         
+        # Invariant part of the Brevo payload
+        self._payload_base = {
+            'sender': {
+                'name': 'AnLex Guard',
+                'email': self.from_email
+            },
+            'to': [
+                {'email': self.to_email}
+            ]
+        }
+        
+        # Keep-alive session so alerts skip the TCP/TLS handshake
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._http.headers.update({
+            'accept': 'application/json',
+            'api-key': self.api_key,
+            'content-type': 'application/json'
+        })
+        
         if self.enabled:
             logger.info(f"Email service enabled: {from_email} -> {to_email}")
         else:
@@ -47,27 +68,10 @@ class EmailService:
             return False
         
         try:
-            headers = {
-                'accept': 'application/json',
-                'api-key': self.api_key,
-                'content-type': 'application/json'
-            }
-            
-            payload = {
-                'sender': {
-                    'name': 'AnLex Guard',
-                    'email': self.from_email
-                },
-                'to': [
-                    {'email': self.to_email}
-                ],
-                'subject': subject,
-                'textContent': body
-            }
+            payload = {**self._payload_base, 'subject': subject, 'textContent': body}
             
-            response = requests.post(
+            response = self._http.post(
                 self.api_url,
-                headers=headers,
                 json=payload,
                 timeout=10
             )
@@ -81,4 +85,8 @@ class EmailService:
                 
         except Exception as e:
             logger.error(f"Email send error: {e}", exc_info=True)
-            return False
\ No newline at end of file
+            return False
+    
+    def close(self):
+        """Close pooled HTTP connections"""
+        self._http.close()
\ No newline at end of file
@@ -2,6 +2,8 @@
 Local Storage Service
 Manages local file storage for images and data
 """
+import os
+import heapq
 import logging
 from pathlib import Path
 from typing import List, Dict, Any
@@ -33,11 +35,11 @@ class StorageService:
             List of image metadata dictionaries
         """
         try:
-            images = sorted(
-                self.base_dir.glob("*.jpg"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True
-            )[:limit]
+            # DirEntry caches stat(), and only the newest `limit` entries are ordered
+            with os.scandir(self.base_dir) as it:
+                entries = [e for e in it if e.name.endswith('.jpg') and e.is_file()]
+            
+            images = heapq.nlargest(limit, entries, key=lambda e: e.stat().st_mtime)
             
             return [
                 {
@@ -60,15 +62,13 @@ class StorageService:
             max_count: Maximum number of images to keep
         """
         try:
-            images = sorted(
-                self.base_dir.glob("*.jpg"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True
-            )
+            with os.scandir(self.base_dir) as it:
+                entries = [e for e in it if e.name.endswith('.jpg') and e.is_file()]
             
-            if len(images) > max_count:
-                for img in images[max_count:]:
-                    img.unlink()
+            excess = len(entries) - max_count
+            if excess > 0:
+                for img in heapq.nsmallest(excess, entries, key=lambda e: e.stat().st_mtime):
+                    os.unlink(img.path)
                     logger.info(f"Deleted old image: {img.name}")
                     
         except Exception as e: